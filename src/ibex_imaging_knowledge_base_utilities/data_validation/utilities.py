@@ -17,12 +17,23 @@
 # =========================================================================
 
 import requests
+import threading
 import time
+import urllib.parse
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
 import sys
+import pathlib
 import pandas as pd
 import hashlib
+from ..md_generation.utilities import _read_timestamp_cache, _write_timestamp_cache
+
+# Default headers used for all url existence checks. Built once at module scope
+# so that the dict isn't reconstructed on every call (url checks are performed
+# many times per validation run).
+_REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"  # noqa E501
+}
 
 
 def md5sum(filename):
@@ -34,20 +45,34 @@ def md5sum(filename):
     disk are different). This isn't easily accessible to users who can compute the hash for a file on
     disk.
     """
-    md5 = hashlib.md5()
+    # hashlib.file_digest (Python 3.11+) reads with a large buffer and hashes in
+    # C with the GIL released, instead of a Python loop over small chunks. Fall
+    # back to a chunked read loop on Python 3.10, the minimum supported version.
     with open(filename, "rb") as fp:
-        for chunk in iter(lambda: fp.read(128 * md5.block_size), b""):
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(fp, "md5").hexdigest()
+        md5 = hashlib.md5()
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
             md5.update(chunk)
         return md5.hexdigest()
 
 
+def md5sum_many(filenames, max_workers=None):
+    """
+    Compute the md5 hashsum values for the given files concurrently, returning a
+    dictionary mapping file name to hash. Hashing is embarrassingly parallel and
+    both the reads and the hash computation release the GIL, so threads overlap
+    disk I/O with computation across files.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(filenames, executor.map(md5sum, filenames)))
+
+
 def url_exists(
     url,
     request_timeout=2,
     allow_redirects=True,
-    request_headers={
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"  # noqa E501
-    },
+    request_headers=None,
     **kwargs,
 ):
     """
@@ -56,6 +81,8 @@ def url_exists(
     the 403 "forbidden" code (server understands the request but refuses to authorize it) is considered
     success too.
     """
+    if request_headers is None:
+        request_headers = _REQUEST_HEADERS
     try:
         # Using requests.head and not requests.get because
         # we don't need the webpage content.
@@ -83,9 +110,7 @@ def url_exists_with_retries(
     retry_num=0,
     request_timeout=2,
     allow_redirects=True,
-    request_headers={
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"  # noqa E501
-    },
+    request_headers=None,
     **kwargs,
 ):
     if url_exists(url, request_timeout, allow_redirects, request_headers, **kwargs):
@@ -103,36 +128,82 @@ def url_exists_with_retries(
     return False
 
 
+# Location of the on disk cache listing urls that were found to exist in previous
+# runs and how long a cached success remains valid. The validation scripts are run
+# repeatedly on near identical files (continuous integration setting), so most urls
+# were already checked in a previous run and don't need to be checked again.
+# Reading and writing the cache is shared with the other timestamp caches (vendor
+# urls, UniProt accessions) via the md_generation utilities.
+_URL_CACHE_FILE_PATH = pathlib.Path.home() / ".cache" / "ibex_kb" / "url_cache.json"
+_URL_CACHE_TTL_SEC = 7 * 24 * 60 * 60
+
+# Maximal number of concurrent requests issued to a single host by check_urls.
+_MAX_REQUESTS_PER_HOST = 4
+
+
 def check_urls(
     urls_container,
-    num_threads=2,
+    num_threads=32,
     retry_num=0,
     request_timeout=10,
     allow_redirects=True,
-    request_headers={
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"  # noqa E501
-    },
+    request_headers=None,
+    use_cache=True,
     **kwargs,
 ):
     """
-    Check url existence for a number of urls in a container. It is assumed that the urls
-    are for different hosts (if they are on the same host then better to use a
-    requests.Session object).
+    Check url existence for a number of urls in a container. Concurrency is capped
+    at a few in flight requests per distinct host, so that checking many urls on
+    the same host (e.g. all the ORCID urls are on orcid.org) doesn't trigger server
+    side throttling which would be reported as validation failures. Urls that were
+    successfully checked in a previous run, within the cache time-to-live period,
+    are not re-checked (set use_cache to False to force checking all urls).
     """
-    with ThreadPoolExecutor(num_threads) as executor:
-        return list(
-            executor.map(
-                lambda x: url_exists_with_retries(
-                    url=x,
-                    retry_num=retry_num,
-                    request_timeout=request_timeout,
-                    allow_redirects=allow_redirects,
-                    request_headers=request_headers,
-                    **kwargs,
-                ),
-                urls_container,
+    urls = list(urls_container)
+    cache = (
+        _read_timestamp_cache(_URL_CACHE_FILE_PATH, _URL_CACHE_TTL_SEC)
+        if use_cache
+        else {}
+    )
+    uncached_urls = [url for url in urls if url not in cache]
+    # The checks are network I/O bound, probe urls concurrently so the wall
+    # time approaches the slowest single check instead of the sum of all checks.
+    # A semaphore per host enforces the per host limit even when the batch is
+    # dominated by a single host (e.g. youtube urls in videos.csv), while urls
+    # on other hosts are still checked in parallel.
+    host_semaphores = {
+        host: threading.Semaphore(_MAX_REQUESTS_PER_HOST)
+        for host in {urllib.parse.urlparse(url).netloc for url in uncached_urls}
+    }
+
+    def check_one(url):
+        with host_semaphores[urllib.parse.urlparse(url).netloc]:
+            return url_exists_with_retries(
+                url=url,
+                retry_num=retry_num,
+                request_timeout=request_timeout,
+                allow_redirects=allow_redirects,
+                request_headers=request_headers,
+                **kwargs,
             )
+
+    with ThreadPoolExecutor(min(num_threads, max(len(uncached_urls), 1))) as executor:
+        uncached_results = list(executor.map(check_one, uncached_urls))
+    uncached_results_iter = iter(uncached_results)
+    results = [True if url in cache else next(uncached_results_iter) for url in urls]
+    if use_cache:
+        # Only successful checks are cached, failures may be transient network
+        # issues and are re-checked on the next run.
+        check_time = time.time()
+        cache.update(
+            {
+                url: check_time
+                for url, url_exist in zip(uncached_urls, uncached_results)
+                if url_exist
+            }
         )
+        _write_timestamp_cache(_URL_CACHE_FILE_PATH, cache)
+    return results
 
 
 def duplicated_entries_single_value_columns(df, column_names):
@@ -149,13 +220,14 @@ def duplicated_entries_single_value_columns(df, column_names):
 
     duplicate_information = {}
     for col in column_names:
-        duplicated_entries = df[col][df[col].duplicated()]
-        duplicate_set = set(duplicated_entries)
-        if duplicate_set:
+        # unique() deduplicates at the C level and returns an ndarray, cheaper
+        # than building a Python set from the series
+        duplicated_entries = df[col][df[col].duplicated()].unique()
+        if duplicated_entries.size:
             duplicate_information[col] = ", ".join(
                 [
                     f"{dup} rows {[i + shift_index for i in df.index[df[col] == dup].to_list()]}"
-                    for dup in duplicate_set
+                    for dup in duplicated_entries
                 ]
             )
     return duplicate_information
@@ -169,7 +241,7 @@ def duplicated_entries_multi_value_columns(df, column_names):
     duplicate_information = {}
     for col in column_names:
         problem_rows = []
-        for i, x in enumerate(df[col].to_numpy().flatten()):
+        for i, x in enumerate(df[col].to_numpy().ravel()):
             current_data = [v.strip() for v in x.split(";") if v.strip() != ""]
             if len(current_data) != len(set(current_data)):
                 problem_rows += [i + shift_index]
@@ -183,19 +255,17 @@ def get_multi_column_data(df, single_data_columns, multi_data_columns):
     Return a set containing the unique data elements found in the single_data_columns and multi_data_columns.
     multi_data_columns contain multiple data elements separated by semicolons.
     """
+    data_set = set()
     if single_data_columns:
-        data_list = [
+        data_set.update(
             data
-            for data in df[single_data_columns].to_numpy().flatten()
+            for data in df[single_data_columns].to_numpy().ravel()
             if data.strip() != ""
-        ]
-    else:
-        data_list = []
+        )
     if multi_data_columns:
-        multi_data = df[multi_data_columns].to_numpy().flatten()
-        for x in multi_data:
-            data_list += [v.strip() for v in x.split(";") if v.strip() != ""]
-    return set(data_list)
+        for x in df[multi_data_columns].to_numpy().ravel():
+            data_set.update(v.strip() for v in x.split(";") if v.strip() != "")
+    return data_set
 
 
 def validate_df(
@@ -265,52 +335,66 @@ def validate_df(
         )
         return 1
 
-    # check for leading/trailing whitespace in dataframe entries
-    leading_trailing = df.map(lambda x: x != x.strip())
-    leading_trailing_rows = df.index[leading_trailing.any(axis=1)].to_list()
-    if leading_trailing_rows:
-        print(
-            "The following rows have entries with leading/trailing whitespace (please remove): "
-            + f"{[str(i + shift_index) for i in leading_trailing_rows]}.",
-            file=sys.stderr,
-        )
-        return 1
+    # The following checks are independent passes over the dataframe that spend most
+    # of their time in pandas/numpy C code which releases the GIL, so we run them
+    # concurrently. Each check returns a list of error messages (empty list when the
+    # check passed) and the messages are reported afterwards in a deterministic order,
+    # matching the sequential evaluation order.
+    def check_leading_trailing_whitespace():
+        leading_trailing = df.map(lambda x: x != x.strip())
+        leading_trailing_rows = df.index[leading_trailing.any(axis=1)].to_list()
+        if leading_trailing_rows:
+            return [
+                "The following rows have entries with leading/trailing whitespace (please remove): "
+                + f"{[str(i + shift_index) for i in leading_trailing_rows]}."
+            ]
+        return []
 
-    # check columns in data_required_column_names all have content
-    sub_df = df[data_required_column_names]
-    empty_entries = sub_df == ""
-    empty_rows = sub_df.index[empty_entries.any(axis=1)].to_list()
-    if empty_rows:
-        print(
-            f"The following rows have cells that are required to have data but don't ({data_required_column_names}): "
-            + f"{[str(i + shift_index) for i in empty_rows]}.",
-            file=sys.stderr,
-        )
-        return 1
+    def check_required_columns_content():
+        sub_df = df[data_required_column_names]
+        empty_entries = sub_df == ""
+        empty_rows = sub_df.index[empty_entries.any(axis=1)].to_list()
+        if empty_rows:
+            return [
+                f"The following rows have cells that are required to have data but don't ({data_required_column_names}): "  # noqa E501
+                + f"{[str(i + shift_index) for i in empty_rows]}."
+            ]
+        return []
 
-    # get duplicated entries in columns that are required to have unique ones
-    if unique_single_value_columns:
+    def check_unique_single_value_columns():
+        if not unique_single_value_columns:
+            return []
         duplicates = duplicated_entries_single_value_columns(
             df, unique_single_value_columns
         )
-        if duplicates:
-            for c_name, info in duplicates.items():
-                print(
-                    f"Duplicate information in column {c_name} not allowed: {duplicates[c_name]}.",
-                    file=sys.stderr,
-                )
-            return 1
-    # check if a multi-value column contains the same value multiple times in the same cell
-    if unique_multi_value_columns:
+        return [
+            f"Duplicate information in column {c_name} not allowed: {duplicates[c_name]}."
+            for c_name in duplicates
+        ]
+
+    def check_unique_multi_value_columns():
+        if not unique_multi_value_columns:
+            return []
         duplicates = duplicated_entries_multi_value_columns(
             df, unique_multi_value_columns
         )
-        if duplicates:
-            for c_name, info in duplicates.items():
-                print(
-                    f"Duplicate information in column {c_name} not allowed: {duplicates[c_name]}.",
-                    file=sys.stderr,
-                )
+        return [
+            f"Duplicate information in column {c_name} not allowed: {duplicates[c_name]}."
+            for c_name in duplicates
+        ]
+
+    checks = [
+        check_leading_trailing_whitespace,
+        check_required_columns_content,
+        check_unique_single_value_columns,
+        check_unique_multi_value_columns,
+    ]
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        check_results = list(executor.map(lambda check: check(), checks))
+    for error_messages in check_results:
+        if error_messages:
+            for error_message in error_messages:
+                print(error_message, file=sys.stderr)
             return 1
 
     # check that the urls exist (no "not found" 404 errors)
@@ -346,10 +430,11 @@ def validate_df(
     if column_is_in:
         found_unexpected_values = False
         for column_name, expected_values in column_is_in.items():
-            current_series = df[column_name]
-            unexpected_values = set(
-                current_series[~current_series.isin(expected_values)]
-            )
+            # Validation only needs the offending values, not their row positions,
+            # so a set difference over the column values is cheaper than isin which
+            # rebuilds a hash table from expected_values on every call.
+            expected_set = frozenset(expected_values)
+            unexpected_values = set(df[column_name]) - expected_set
             if unexpected_values:
                 found_unexpected_values = True
                 print(
@@ -366,20 +451,17 @@ def validate_df(
     if multi_value_column_is_in:
         found_unexpected_values = False
         for column_name, expected_values in multi_value_column_is_in.items():
+            expected_set = frozenset(expected_values)
             current_column_values = (
-                df[column_name].str.split(";", expand=True).to_numpy().flatten()
+                df[column_name].str.split(";", expand=True).to_numpy().ravel()
             )
             # Get all the values that are not NaN, None and empty string
-            current_column_values = pd.Series(
-                current_column_values[
-                    np.logical_and(
-                        current_column_values != "", ~pd.isna(current_column_values)
-                    )
-                ]
-            )
-            unexpected_values = set(
-                current_column_values[~current_column_values.isin(expected_values)]
-            )
+            current_column_values = current_column_values[
+                np.logical_and(
+                    current_column_values != "", ~pd.isna(current_column_values)
+                )
+            ]
+            unexpected_values = set(current_column_values) - expected_set
             if unexpected_values:
                 found_unexpected_values = True
                 print(
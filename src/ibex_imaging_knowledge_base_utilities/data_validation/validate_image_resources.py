@@ -25,7 +25,7 @@ from ibex_imaging_knowledge_base_utilities.argparse_types import (
     file_path_endswith,
     dir_path,
 )
-from .utilities import validate_df, md5sum
+from .utilities import validate_df, md5sum_many
 
 """
 This script validates the contents of the image_resources.csv file. Do basic validation and ensure
@@ -77,13 +77,10 @@ def validate_image_resources(
         )
         return 1
 
-    # Get all the files where the hash recorded in the image resources file differs from the actual file hash
-    problematic_files = df["file"][
-        df[["file_full_path", "md5"]].apply(
-            lambda x: md5sum(x.iloc[0]) != x.iloc[1],
-            axis=1,
-        )
-    ]
+    # Get all the files where the hash recorded in the image resources file differs
+    # from the actual file hash. The files are hashed concurrently.
+    actual_md5s = md5sum_many(df["file_full_path"].tolist())
+    problematic_files = df["file"][df["file_full_path"].map(actual_md5s) != df["md5"]]
     if not problematic_files.empty:
         print(
             f"The hash value for the following files does not match the actual value: {problematic_files}",
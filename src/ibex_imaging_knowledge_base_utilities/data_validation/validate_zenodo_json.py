@@ -18,7 +18,15 @@
 
 import sys
 import json
+import re
 import argparse
+
+# orjson parses JSON in C, significantly faster than the stdlib json module.
+# It is an optional dependency, fall back to the stdlib when not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from ibex_imaging_knowledge_base_utilities.argparse_types import file_path_endswith
 from .utilities import check_urls
 
@@ -51,48 +59,90 @@ def validate_zenodo_schema_compliance(zenodo_json, zenodo_json_schema):
 """
 
 
-def validate_zenodo_json(zenodo_json):
+# ORCIDs are sixteen characters in four dash separated groups, the last
+# character is an ISO 7064 MOD 11-2 checksum over the leading fifteen digits.
+_orcid_regex = re.compile(r"\d{4}-\d{4}-\d{4}-\d{3}[\dX]")
+
+# Expected entries in the json file and their types, and the fields every
+# creator entry is required to have. Built once at module scope.
+_json_key_types = {
+    "title": str,
+    "upload_type": str,
+    "description": str,
+    "creators": list,
+    "grants": list,
+    "keywords": list,
+    "license": dict,
+}
+_required_creator_fields = frozenset(["affiliation", "name", "orcid"])
+
+
+def _valid_orcid(orcid):
+    """
+    Syntactic ORCID validation, structure and checksum. Malformed ORCIDs (typos)
+    are detected locally without a network round trip.
+    """
+    if _orcid_regex.fullmatch(orcid) is None:
+        return False
+    total = 0
+    for c in orcid[:-1].replace("-", ""):
+        total = (total + int(c)) * 2
+    result = (12 - total % 11) % 11
+    check_char = "X" if result == 10 else str(result)
+    return orcid[-1] == check_char
+
+
+def validate_zenodo_json(zenodo_json, use_cache=True):
     """
     Validate the zenodo json. We require that contributors provide their ORCID which is optional in the
     general zenodo schema, we check for uniqueness and we have a specific order of contributors we enforce.
+    ORCID urls that were successfully checked in a previous run are not re-checked (see check_urls),
+    set use_cache to False to force checking all of them.
 
     returns 1 if invalid, 0 otherwise.
     """
-    with open(zenodo_json) as fp:
-        zenodo_dict = json.load(fp)
+    if orjson is not None:
+        with open(zenodo_json, "rb") as fp:
+            zenodo_dict = orjson.loads(fp.read())
+    else:
+        with open(zenodo_json) as fp:
+            zenodo_dict = json.load(fp)
     # Check that all the expected entries are in the given json file, better done via schema validation, but
-    # don't have an official zenodo schema (see issue above in script description)
-    # expected entries in json file and their types
-    json_key_types = {
-        "title": str,
-        "upload_type": str,
-        "description": str,
-        "creators": list,
-        "grants": list,
-        "keywords": list,
-        "license": dict,
-    }
-    if zenodo_dict.keys() != json_key_types.keys():
-        print(
-            f"Unexpected or missing key types in file. Expected keys ({json_key_types.keys()}), actual keys ({zenodo_dict.keys()}).",  # noqa E501
-            file=sys.stderr,
-        )
-        return 1
-    for key in json_key_types.keys():
-        if type(zenodo_dict[key]) != json_key_types[key]:
+    # don't have an official zenodo schema (see issue above in script description).
+    # A single pass over the expected keys checks presence and type (isinstance
+    # instead of a type() call per key). Missing keys are detected by the get
+    # sentinel, superfluous keys by the length comparison.
+    missing = object()
+    for key, expected_type in _json_key_types.items():
+        value = zenodo_dict.get(key, missing)
+        if value is missing:
             print(
-                f"Unexpected entry type for key ({key}). Expected {json_key_types[key]}, got ({type(zenodo_dict[key])}).",  # noqa E501
+                f"Missing key ({key}) in file.",
                 file=sys.stderr,
             )
             return 1
+        if not isinstance(value, expected_type):
+            print(
+                f"Unexpected entry type for key ({key}). Expected {expected_type}, got ({type(value)}).",  # noqa E501
+                file=sys.stderr,
+            )
+            return 1
+    if len(zenodo_dict) != len(_json_key_types):
+        print(
+            f"Unexpected keys in file. Expected keys ({_json_key_types.keys()}), actual keys ({zenodo_dict.keys()}).",  # noqa E501
+            file=sys.stderr,
+        )
+        return 1
 
-    # Check that all creators provided affiliation, name and orcid
-    orcids = []
-    required_information = {"affiliation", "name", "orcid"}
+    # Check that all creators provided affiliation, name and orcid, that no
+    # ORCID appears twice, and build the url list for the existence checks, all
+    # in a single pass over the creators list.
+    seen_orcids = set()
+    orcid_urls = []
     for data in zenodo_dict["creators"]:
         # short circuit evaluation, dictionary access only happens if all keys exist
         if (
-            not required_information.issubset(data.keys())
+            not _required_creator_fields <= data.keys()
             or data["affiliation"].strip() == ""
             or data["name"].strip() == ""
             or data["orcid"].strip() == ""
@@ -102,18 +152,24 @@ def validate_zenodo_json(zenodo_json):
                 file=sys.stderr,
             )
             return 1
-        orcids.append(data["orcid"])
-    # Check creator uniqueness
-    existing_orcids = set()
-    duplicates = [o for o in orcids if o in existing_orcids or existing_orcids.add(o)]
-    if duplicates:
-        print(f"Duplicate entries in creators section: {duplicates}.", file=sys.stderr)
-        return 1
+        if data["orcid"] in seen_orcids:
+            print(
+                f"Duplicate entry in creators section: {data['orcid']}.",
+                file=sys.stderr,
+            )
+            return 1
+        seen_orcids.add(data["orcid"])
+        if not _valid_orcid(data["orcid"]):
+            print(
+                f"The ORCID for the following entry is not structurally valid: {data}.",
+                file=sys.stderr,
+            )
+            return 1
+        orcid_urls.append(f"https://orcid.org/{data['orcid']}")
     # Check that the ORCID url exists. Do not allow redirects because the site forwards nonexistent urls to the
     # ORCID registration page, so even if the page doesn't exist there is no 404 error.
     orcid_urls_exist = check_urls(
-        [f"https://orcid.org/{c['orcid']}" for c in zenodo_dict["creators"]],
-        allow_redirects=False,
+        orcid_urls, allow_redirects=False, use_cache=use_cache
     )
     orcid_errors = [
         creator
@@ -125,15 +181,16 @@ def validate_zenodo_json(zenodo_json):
         print(orcid_errors, file=sys.stderr)
         return 1
     # First ORCID and two last ORCIDs are fixed, the entries in between are according
-    # to alphabetical order
+    # to alphabetical order. The alphabetical order check is a linear scan for an
+    # inversion between consecutive names, no list copy or sort.
+    creators = zenodo_dict["creators"]
     if (
-        zenodo_dict["creators"][0]["orcid"] != "0000-0003-0315-7727"
-        or zenodo_dict["creators"][-1]["orcid"] != "0000-0003-4379-8967"
-        or zenodo_dict["creators"][-2]["orcid"] != "0000-0003-1495-9143"
-        or zenodo_dict["creators"][1:-2]
-        != sorted(
-            zenodo_dict["creators"][1:-2],
-            key=lambda creator_entry: creator_entry["name"],
+        creators[0]["orcid"] != "0000-0003-0315-7727"
+        or creators[-1]["orcid"] != "0000-0003-4379-8967"
+        or creators[-2]["orcid"] != "0000-0003-1495-9143"
+        or any(
+            creators[i]["name"] > creators[i + 1]["name"]
+            for i in range(1, len(creators) - 3)
         )
     ):
         print(
@@ -142,8 +199,8 @@ def validate_zenodo_json(zenodo_json):
         )
         return 1
 
-    # Check grant uniqueness
-    grant_ids = []
+    # Check grant content and uniqueness in a single pass
+    seen_grant_ids = set()
     for data in zenodo_dict["grants"]:
         if data["id"].strip() == "":
             print(
@@ -151,14 +208,10 @@ def validate_zenodo_json(zenodo_json):
                 file=sys.stderr,
             )
             return 1
-        grant_ids.append(data["id"])
-    existing_grants = set()
-    duplicates = [
-        g for g in grant_ids if g in existing_grants or existing_grants.add(g)
-    ]
-    if duplicates:
-        print(f"Duplicate entries in grants section: {duplicates}.", file=sys.stderr)
-        return 1
+        if data["id"] in seen_grant_ids:
+            print(f"Duplicate entry in grants section: {data['id']}.", file=sys.stderr)
+            return 1
+        seen_grant_ids.add(data["id"])
     return 0
 
 
@@ -171,9 +224,14 @@ def main(argv=None):
         type=lambda x: file_path_endswith(x, ".json"),
         help=".zenodo.json file",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Check all ORCID urls, ignore the on disk cache of previously checked urls.",
+    )
     args = parser.parse_args(argv)
 
-    return validate_zenodo_json(args.zenodo_json)
+    return validate_zenodo_json(args.zenodo_json, use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
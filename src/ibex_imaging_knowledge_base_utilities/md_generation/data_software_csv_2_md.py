@@ -17,6 +17,7 @@
 # =========================================================================
 
 import pandas as pd
+import numpy as np
 import argparse
 import sys
 from ibex_imaging_knowledge_base_utilities.argparse_types import (
@@ -38,48 +39,20 @@ Assumption: The csv files are valid. They conform to the expected column titles,
 """
 
 
-def dataset_2_title_md_str(dataset_info):
-    # title, download url and license always have content but a dataset may not have a publication associated
-    # with it.
-    title_md_str = f"{dataset_info['Title']} [[download]({dataset_info['URL']}), license: {dataset_info['License']}"
-    if not dataset_info["Associated Publication DOIs"]:
-        title_md_str += "]"
-    else:
-        publication_dois = [
-            p.strip()
-            for p in dataset_info["Associated Publication DOIs"].split(";")
-            if p.strip() != ""
-        ]
-        title_md_str += (
-            ", associated publication DOIs: "
-            + ", ".join([f"[{p}](https://doi.org/{p})" for p in publication_dois])
-            + "]"
-        )
-    return title_md_str
-
-
-def software_2_title_md_str(software_info):
-    # title, download url and license always have content but software may not have a publication associated and the
-    # programming language and repository may not be known
-    title_md_str = f"{software_info['Title']} [[download]({software_info['URL']}), license: {software_info['License']}"
-    if software_info["Language"]:
-        title_md_str += f", language: {software_info['Language']}"
-    if software_info["Repository"]:
-        title_md_str += f", [repository]({software_info['Repository']})"
-    if not software_info["Associated Publication DOIs"]:
-        title_md_str += "]"
-    else:
-        publication_dois = [
-            p.strip()
-            for p in software_info["Associated Publication DOIs"].split(";")
-            if p.strip() != ""
-        ]
-        title_md_str += (
-            ", associated publication DOIs: "
-            + ", ".join([f"[{p}](https://doi.org/{p})" for p in publication_dois])
-            + "]"
-        )
-    return title_md_str
+def _doi_links_suffix(dois_str):
+    """
+    Closing portion of a title markdown string. Datasets and software may not have
+    publications associated with them, in which case only the closing bracket is
+    returned. Otherwise the semicolon separated DOIs are linked via doi.org.
+    """
+    if not dois_str:
+        return "]"
+    publication_dois = [p.strip() for p in dois_str.split(";") if p.strip() != ""]
+    return (
+        ", associated publication DOIs: "
+        + ", ".join([f"[{p}](https://doi.org/{p})" for p in publication_dois])
+        + "]"
+    )
 
 
 def data_software_csv_to_md(
@@ -94,51 +67,85 @@ def data_software_csv_to_md(
     # Process the datasets csv:
     # Read the information, keep entries that are "NA", don't convert to nan and sort according
     # to year in reverse chronological order.
-    df = pd.read_csv(data_csv_file_path, dtype=str, keep_default_na=False)
+    df = pd.read_csv(
+        data_csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
     df = df.sort_values(by=["Year"], ascending=False)
 
-    # Create the title portion of the datasets table
-    df["Title"] = df[["Title", "URL", "Associated Publication DOIs", "License"]].apply(
-        lambda x: dataset_2_title_md_str(x), axis=1
+    # Create the title portion of the datasets table. Title, download url and
+    # license always have content, the publication DOI suffix handles rows without
+    # associated publications. Vectorized concatenation, one C loop per column
+    # instead of a Python call per row.
+    doi_suffix = pd.Series(
+        [_doi_links_suffix(d) for d in df["Associated Publication DOIs"].tolist()],
+        index=df.index,
+    )
+    df["Title"] = (
+        df["Title"]
+        + " [[download]("
+        + df["URL"]
+        + "), license: "
+        + df["License"]
+        + doi_suffix
     )
     # Convert the detailed description to markdown, with the details html markup (accordion view).
-    df["Details"] = df["Details"].apply(_description_2_md)
+    df["Details"] = _description_2_md(df["Details"])
     dataset_table = df[["Title", "Details"]]
 
     # Process the software csv:
     # Read the information, keep entries that are "NA", don't convert to nan and sort according
     # to year in reverse chronological order.
-    df = pd.read_csv(software_csv_file_path, dtype=str, keep_default_na=False)
+    df = pd.read_csv(
+        software_csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
     df = df.sort_values(by=["Year"], ascending=False)
 
-    # Create the title portion of the datasets table
-    df["Title"] = df[
-        [
-            "Title",
-            "URL",
-            "Repository",
-            "Language",
-            "Associated Publication DOIs",
-            "License",
-        ]
-    ].apply(lambda x: software_2_title_md_str(x), axis=1)
+    # Create the title portion of the software table. The programming language and
+    # repository may not be known, splice those fragments in only where present.
+    doi_suffix = pd.Series(
+        [_doi_links_suffix(d) for d in df["Associated Publication DOIs"].tolist()],
+        index=df.index,
+    )
+    language_suffix = np.where(
+        df["Language"] != "", ", language: " + df["Language"], ""
+    )
+    repository_suffix = np.where(
+        df["Repository"] != "", ", [repository](" + df["Repository"] + ")", ""
+    )
+    df["Title"] = (
+        df["Title"]
+        + " [[download]("
+        + df["URL"]
+        + "), license: "
+        + df["License"]
+        + language_suffix
+        + repository_suffix
+        + doi_suffix
+    )
     # Convert the detailed description to markdown, with the details html markup (accordion view).
-    df["Details"] = df["Details"].apply(_description_2_md)
+    df["Details"] = _description_2_md(df["Details"])
     software_table = df[["Title", "Details"]]
 
     with open(template_file_path, "r") as fp:
         input_md_str = fp.read()
-    with open(output_dir / template_file_path.stem, "w") as fp:
-        fp.write(
-            input_md_str.format(
-                data_table=_dataframe_2_md(
-                    dataset_table, index=False, colalign=["left", "left"]
-                ),
-                software_table=_dataframe_2_md(
-                    software_table, index=False, colalign=["left", "left"]
-                ),
-            )
-        )
+    # Split the template around the placeholders and write the pieces separately,
+    # avoiding the full template+tables copy str.format would materialize.
+    pre, rest = input_md_str.split("{data_table}", 1)
+    mid, post = rest.split("{software_table}", 1)
+    with open(output_dir / template_file_path.stem, "w", buffering=1 << 20) as fp:
+        fp.write(pre)
+        fp.write(_dataframe_2_md(dataset_table, colalign=["left", "left"]))
+        fp.write(mid)
+        fp.write(_dataframe_2_md(software_table, colalign=["left", "left"]))
+        fp.write(post)
 
 
 def main(argv=None):
@@ -30,26 +30,28 @@ def dict_glossary_to_md(
     template_file_path, data_dict_file_path, glossary_file_path, output_dir
 ):
     # Read the dataframe and keep entries that are "NA", don't convert to nan
-    dict_df = pd.read_csv(data_dict_file_path, encoding="ISO-8859-1")
-    glossary_df = pd.read_csv(glossary_file_path, encoding="ISO-8859-1")
+    dict_df = pd.read_csv(data_dict_file_path, encoding="ISO-8859-1", engine="pyarrow")
+    glossary_df = pd.read_csv(
+        glossary_file_path, encoding="ISO-8859-1", engine="pyarrow"
+    )
     with open(template_file_path, "r") as fp:
         input_md_str = fp.read()
-    with open(output_dir / template_file_path.stem, "w") as fp:
+    # Split the template around the placeholders and write the pieces separately,
+    # avoiding the intermediate full-template copies that chained str.replace
+    # calls would materialize.
+    pre, rest = input_md_str.split("{reagent_metadata_table}", 1)
+    mid, post = rest.split("{glossary_table}", 1)
+    with open(output_dir / template_file_path.stem, "w", buffering=1 << 20) as fp:
+        fp.write(pre)
+        fp.write(_dataframe_2_md(dict_df, colalign=["left"] * len(dict_df.columns)))
+        fp.write(mid)
         fp.write(
-            input_md_str.replace(
-                "{reagent_metadata_table}",
-                _dataframe_2_md(
-                    dict_df, index=False, colalign=["left"] * len(dict_df.columns)
-                ),
-            ).replace(
-                "{glossary_table}",
-                _dataframe_2_md(
-                    glossary_df,
-                    index=False,
-                    colalign=["left"] * len(glossary_df.columns),
-                ),
+            _dataframe_2_md(
+                glossary_df,
+                colalign=["left"] * len(glossary_df.columns),
             )
         )
+        fp.write(post)
 
 
 def main(argv=None):
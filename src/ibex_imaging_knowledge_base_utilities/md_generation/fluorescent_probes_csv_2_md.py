@@ -44,18 +44,23 @@ def fluorescent_probe_csv_to_md(template_file_path, csv_file_path, output_dir):
     {probe_table} which is replaced with the contents of the actual table.
     """
     # Read the dataframe and keep entries that are "NA", don't convert to nan
-    df = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False)
+    df = pd.read_csv(
+        csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
     df.sort_values(by=["Excitation Max (nm)", "Emission Max (nm)"], inplace=True)
     with open(template_file_path, "r") as fp:
         input_md_str = fp.read()
-    with open(output_dir / template_file_path.stem, "w") as fp:
-        fp.write(
-            input_md_str.format(
-                probe_table=_dataframe_2_md(
-                    df, index=False, colalign=["left"] * len(df.columns)
-                )
-            )
-        )
+    # Split the template around the placeholder and write the pieces separately,
+    # avoiding a full copy of template+table that str.format would materialize.
+    pre, post = input_md_str.split("{probe_table}", 1)
+    with open(output_dir / template_file_path.stem, "w", buffering=1 << 20) as fp:
+        fp.write(pre)
+        fp.write(_dataframe_2_md(df, colalign=["left"] * len(df.columns)))
+        fp.write(post)
 
 
 def main(argv=None):
@@ -43,13 +43,19 @@ def protocols_csv_to_md(template_file_path, csv_file_path, output_dir):
     to contain the string {protocols_table} which is replaced with the contents of the actual table.
     """
     # Read the dataframe and keep entries that are "NA", don't convert to nan
-    df = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False)
-    # Add the hyperlink to the title column, using the string "detailed protocol"
-    df["Title"] = df[["Title", "URL"]].apply(
-        lambda x: f"{x.iloc[0]} [[detailed protocol]({x.iloc[1]})].", axis=1
+    df = pd.read_csv(
+        csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
     )
+    # Add the hyperlink to the title column, using the string "detailed protocol".
+    # Vectorized string concatenation, one C loop per column instead of a Python
+    # call per row.
+    df["Title"] = df["Title"] + " [[detailed protocol](" + df["URL"] + ")]."
     # Convert the detailed description to markdown, with the details html markup (accordion view).
-    df["Details"] = df["Details"].apply(_description_2_md)
+    df["Details"] = _description_2_md(df["Details"])
 
     with open(template_file_path, "r") as fp:
         input_md_str = fp.read()
@@ -57,7 +63,7 @@ def protocols_csv_to_md(template_file_path, csv_file_path, output_dir):
         fp.write(
             input_md_str.format(
                 protocols_table=_dataframe_2_md(
-                    df[["Title", "Details"]], index=False, colalign=["left", "left"]
+                    df[["Title", "Details"]], colalign=["left", "left"]
                 )
             )
         )
@@ -20,12 +20,23 @@ import pandas as pd
 import argparse
 import sys
 import pathlib
+import functools
+import re
+import urllib.parse
 from ibex_imaging_knowledge_base_utilities.argparse_types import (
     file_path_endswith,
     dir_path,
 )
 import requests
-from itertools import chain
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import time
+from .utilities import (
+    _read_timestamp_cache,
+    _write_timestamp_cache,
+    _table_2_md_str,
+    _read_csv_cached,
+)
 
 """
 This script converts the IBEX knowledge-base reagent_resources.csv file to markdown and
@@ -58,116 +69,184 @@ by the string "NA").
 """
 
 
-def short_circuit_requests_get(url, params=None, **kwargs):
-    res = requests.Response()
-    # It's always a success
-    res.status_code = 200
-    return res
-
-
 request_timeout = 1
 request_headers = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"  # noqa E501
 }
 
+# The vendor and UniProt existence checks are independent network requests, so they
+# are issued concurrently from a thread pool. A single shared session, with a
+# connection pool matching the number of threads, reuses TCP/TLS connections
+# across requests instead of performing a handshake per request.
+_max_check_workers = 32
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=_max_check_workers, pool_maxsize=_max_check_workers),
+)
+_session.mount(
+    "http://",
+    HTTPAdapter(pool_connections=_max_check_workers, pool_maxsize=_max_check_workers),
+)
 
-def csv_to_md_str_dict(csv_file_path):
-    df = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False)
+# On disk caches of vendor urls and UniProt accessions that were successfully
+# checked in previous runs. The vendor/UniProt sets are highly stable across
+# commits, so most entries don't need to be re-checked on every CI run.
+_vendor_cache_file_path = (
+    pathlib.Path.home() / ".cache" / "ibex_kb" / "vendor_url_cache.json"
+)
+_uniprot_cache_file_path = (
+    pathlib.Path.home() / ".cache" / "ibex_kb" / "uniprot_cache.json"
+)
+_cache_ttl_sec = 30 * 24 * 60 * 60
+
+
+# Structure of UniProt accession numbers, see
+# https://www.uniprot.org/help/accession_numbers. Structurally invalid
+# accessions (typos) are reported without a network round trip.
+_uniprot_accession_regex = re.compile(
+    r"^[OPQ][0-9][A-Z0-9]{3}[0-9]$|^[A-NR-Z][0-9]([A-Z][A-Z0-9]{2}[0-9]){1,2}$"
+)
+
+
+def _vendor_url_ok(raw_text, url_target):
+    # A malformed url (missing scheme or host) can never resolve, report it
+    # without a network round trip.
+    parse_result = urllib.parse.urlparse(url_target)
+    if not (parse_result.scheme and parse_result.netloc):
+        print(f"Warning: problem with {raw_text} URL ({url_target}), check link...")
+        return False
+    try:
+        # Using head and not get because we don't need the webpage content,
+        # only confirmation that it exists.
+        res = _session.head(
+            url_target,
+            timeout=request_timeout,
+            headers=request_headers,
+            allow_redirects=True,
+        )
+        # HTTP 200 status code for success
+        if res.status_code == 200:
+            return True
+        print(f"Warning: problem with {raw_text} URL ({url_target}), check link...")
+    except requests.exceptions.RequestException:
+        print(f"Warning: problem with {raw_text} URL ({url_target}), check link...")
+    return False
+
+
+def csv_to_md_str_dict(csv_file_path, skip_url_validation=False):
+    df = pd.read_csv(
+        csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
     data_dict = dict(zip(df["Vendor"], df["URL"]))
-    md_str_dict = {}
-    for raw_text, url_target in data_dict.items():
-        try:
-            res = requests.get(
-                url_target,
-                timeout=request_timeout,
-                headers=request_headers,
-                allow_redirects=True,
-            )
-            # HTTP 200 status code for success
-            if res.status_code == 200:
-                md_str_dict[raw_text] = f"[{raw_text}]({url_target})"
-            else:
-                print(
-                    "Warning: problem with {raw_text} URL ({url_target}), check link..."
-                )
-                md_str_dict[raw_text] = f"[{raw_text}]({url_target})"
-        except requests.exceptions.RequestException:
-            print(f"Warning: problem with {raw_text} URL ({url_target}), check link...")
-            md_str_dict[raw_text] = f"[{raw_text}]({url_target})"
-    return md_str_dict
+    if skip_url_validation:
+        return {vendor: f"[{vendor}]({url})" for vendor, url in data_dict.items()}
+    # Only check urls that weren't confirmed in a previous run within the cache
+    # time-to-live. The markdown string is the same whether the check succeeds or
+    # not (see script description), the check only controls the warning.
+    vendor_cache = _read_timestamp_cache(_vendor_cache_file_path, _cache_ttl_sec)
+    uncached_items = [
+        (vendor, url) for vendor, url in data_dict.items() if url not in vendor_cache
+    ]
+    with ThreadPoolExecutor(max_workers=_max_check_workers) as executor:
+        ok_flags = list(
+            executor.map(lambda item: _vendor_url_ok(*item), uncached_items)
+        )
+    check_time = time.time()
+    vendor_cache.update(
+        {url: check_time for (vendor, url), ok in zip(uncached_items, ok_flags) if ok}
+    )
+    _write_timestamp_cache(_vendor_cache_file_path, vendor_cache)
+    return {vendor: f"[{vendor}]({url})" for vendor, url in data_dict.items()}
 
 
-def replace_char_list(input_str, change_chars_list, replacement_char):
-    for c in change_chars_list:
-        if c in input_str:
-            input_str = input_str.replace(c, replacement_char)
-    return input_str
+# Characters that are replaced with an underscore in supporting material file
+# paths. Some of these are invalid in file paths in windows/linux/osx and some
+# don't work well when they appear in file paths used by jekyll and GitHub to
+# create a static page. The translation table is built once at module scope and
+# applied with a single str.translate pass instead of one str.replace pass per
+# character.
+_invalid_path_chars = [
+    " ",
+    "\t",
+    "/",
+    "\\",
+    "{",
+    "}",
+    "[",
+    "]",
+    "(",
+    ")",
+    "<",
+    ">",
+    ":",
+    "&",
+]
+_invalid_path_chars_table = str.maketrans({c: "_" for c in _invalid_path_chars})
 
 
-def data_to_md_str(data, supporting_material_root_dir):
+def orcid_columns_to_md_str(df, column_names, supporting_material_root_dir):
     """
-    The data parameter is a series with three entries:
-    1. String with one or more ORCIDs separated by semicolon, or NA.
-    2. "Target Name / Protein Biomarker"
-    3. "Conjugate"
-    Together these define the path to the supporting material file:
+    Replace the ORCID entries in the given columns, in place, with hyperlinks to
+    the supporting material files. Each cell contains one or more ORCIDs separated
+    by semicolon, or NA. Together with the "Target Name / Protein Biomarker" and
+    "Conjugate" columns these define the path to the supporting material file:
     "Target Name / Protein Biomarker"_"Conjugate"/ORCID.md
+    The link strings are built with vectorized string operations, the translated
+    target_conjugate subpath is computed once and shared between the columns.
     """
-    # List of characters that will be replaced with an underscore. Some of these are invalid
-    # in file paths in windows/linux/osx and some don't work well when they appear in file
-    # paths used by jekyll and GitHub to create a static page. We replace all of them with
-    # an underscore.
-    invalid_chars = [
-        " ",
-        "\t",
-        "/",
-        "\\",
-        "{",
-        "}",
-        "[",
-        "]",
-        "(",
-        ")",
-        "<",
-        ">",
-        ":",
-        "&",
-    ]
-    if data.iloc[0].strip() == "NA":
-        urls_str = "NA"
-    else:
-        urls_str = ""
-        txt = [v.strip() for v in data.iloc[0].split(";") if v.strip() != ""]
-        for v in txt[0:-1]:
-            # Replace spaces, slashes and brackets with underscores assume that the
-            # file exists, data validation happens prior to conversion of data to markdown.
-            tc_subpath = replace_char_list(
-                input_str=f"{data.iloc[1]}_{data.iloc[2]}",
-                change_chars_list=invalid_chars,
-                replacement_char="_",
-            )
-            urls_str += f"[{v}]({supporting_material_root_dir}/{tc_subpath}/{v}.md), "
-        tc_subpath = replace_char_list(
-            input_str=f"{data.iloc[1]}_{data.iloc[2]}",
-            change_chars_list=invalid_chars,
-            replacement_char="_",
-        )
-        urls_str += (
-            f"[{txt[-1]}]({supporting_material_root_dir}/{tc_subpath}/{txt[-1]}.md)"
+    # Replace spaces, slashes and brackets with underscores assume that the
+    # file exists, data validation happens prior to conversion of data to markdown.
+    tc_subpath = (
+        df["Target Name / Protein Biomarker"] + "_" + df["Conjugate"]
+    ).str.translate(_invalid_path_chars_table)
+    for column_name in column_names:
+        exploded_orcids = df[column_name].str.split(";").explode().str.strip()
+        exploded_orcids = exploded_orcids[exploded_orcids != ""]
+        urls_str = (
+            "["
+            + exploded_orcids
+            + "]("
+            + supporting_material_root_dir
+            + "/"
+            + tc_subpath.reindex(exploded_orcids.index)
+            + "/"
+            + exploded_orcids
+            + ".md)"
         )
-    return urls_str
+        na_mask = df[column_name].str.strip() == "NA"
+        df[column_name] = urls_str.groupby(level=0).agg(", ".join)
+        df.loc[na_mask, column_name] = "NA"
 
 
+@functools.lru_cache(maxsize=None)
 def uniprot_to_md_str(uniprot):
+    """
+    Return a (markdown string, confirmed) pair for the given accession. confirmed
+    is only True when the accession was verified with an HTTP 200 response, the
+    markdown hyperlink returned after a network exception is a best effort guess
+    and must not be treated as a confirmed accession (e.g. cached). The result
+    only depends on the accession, memoized so that repeated calls within a
+    session (tests, notebook use) don't re-query the network.
+    """
     if uniprot == "NA":
-        return "NA"
+        return "NA", False
+    if _uniprot_accession_regex.match(uniprot) is None:
+        print(
+            f"Warning: {uniprot} is not a structurally valid UniProt accession, check entry..."
+        )
+        return uniprot, False
     try:
         # See https://www.uniprot.org/help/api_retrieve_entries
         # We use the rest API url because trying to directly connect
         # to the fixed url always succeeds, return code 200,
         # even when it is an error, the 404 page is shown.
         rest_url_str = f"https://rest.uniprot.org/uniprotkb/{uniprot}.txt"
-        res = requests.get(
+        res = _session.head(
             rest_url_str,
             timeout=request_timeout,
             headers=request_headers,
@@ -176,23 +255,14 @@ def uniprot_to_md_str(uniprot):
         # HTTP 200 status code for success
         if res.status_code == 200:
             # Linking to uniprot entries
-            return f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})"
+            return f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})", True
         else:
-            return uniprot
+            return uniprot, False
     except requests.exceptions.RequestException:
         print(
             f"Warning: problem with {uniprot} URL (https://www.uniprot.org/uniprotkb/{uniprot}), check link..."
         )
-        return f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})"
-
-
-def uniprots_to_md(uniprots_str, uniprot_md_str):
-    uniprots_list = [v.strip() for v in uniprots_str.split(";") if v.strip() != ""]
-    urls_str = ""
-    for uniprot in uniprots_list[0:-1]:
-        urls_str += f"{uniprot_md_str[uniprot]}, "
-    urls_str += f"{uniprot_md_str[uniprots_list[-1]]}"
-    return urls_str
+        return f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})", False
 
 
 def csv_to_md_with_url(
@@ -200,55 +270,97 @@ def csv_to_md_with_url(
     csv_file_path,
     supporting_material_root_dir,
     vendor_to_website_csv_file_path,
+    skip_url_validation=False,
 ):
     """
     Convert the IBEX knowledge-base reagent resources csv file to markdown and add links to the supporting
     material files. Output is written to a file named markdown.md in the parent directory
     of the supporting_material_root_dir. The md_template_path file is expected to contain the
     string {reagent_resources_table} which is replaced with the contents of the actual table.
+    When skip_url_validation is set the UniProt and vendor links are constructed directly
+    from the accessions and urls, no network requests, caches or thread pools are involved.
     """
     # Read the dataframe and keep entries that are "NA", don't convert to nan
-    df = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False)
-    # Sort dataframe according to target, ignoring case.
-    df.sort_values(
-        by=["Target Name / Protein Biomarker"],
-        inplace=True,
-        key=lambda x: x.str.lower(),
-    )
+    df = _read_csv_cached(csv_file_path)
+    # Sort dataframe according to target, ignoring case. The lowercased sort key
+    # is computed once into a helper column instead of via the sort_values key
+    # callback, which materializes and discards the lowercased series internally.
+    df["_sort_key"] = df["Target Name / Protein Biomarker"].str.lower()
+    df.sort_values(by=["_sort_key"], inplace=True)
+    df.drop(columns="_sort_key", inplace=True)
     supporting_material_path = pathlib.PurePath(supporting_material_root_dir).name
     if not df.empty:
         print("Start linking to supporting material...")
-        df["Agree"] = df[
-            ["Agree", "Target Name / Protein Biomarker", "Conjugate"]
-        ].apply(lambda x: data_to_md_str(x, supporting_material_path), axis=1)
-        df["Disagree"] = df[
-            ["Disagree", "Target Name / Protein Biomarker", "Conjugate"]
-        ].apply(
-            lambda x: data_to_md_str(
-                x, pathlib.PurePath(supporting_material_root_dir).name
-            ),
-            axis=1,
-        )
+        orcid_columns_to_md_str(df, ["Agree", "Disagree"], supporting_material_path)
         print("Finished linking to supporting material...")
         print("Start linking to UniProt...")
         # Link to the UniProt Knowledgebase. Get the unique uniprots and the corresponding
-        # hyperlinked markdown string.
-        unique_uniports = set(
-            chain(
-                *df["UniProt Accession Number"].apply(
-                    lambda x: [v.strip() for v in x.split(";")]
+        # hyperlinked markdown string. The split/strip is done with vectorized string
+        # operations, the exploded series is reused below when substituting the
+        # hyperlinked strings back into the multi-value cells.
+        exploded_uniprots = (
+            df["UniProt Accession Number"].str.split(";").explode().str.strip()
+        )
+        exploded_uniprots = exploded_uniprots[exploded_uniprots != ""]
+        unique_uniports = set(exploded_uniprots.unique())
+        if skip_url_validation:
+            # Fast path, the common CI configuration. Links are built directly from
+            # the accessions, no network requests, caches or thread pools.
+            uniprot_md_str = {
+                uniprot: (
+                    uniprot
+                    if uniprot == "NA"
+                    else f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})"
                 )
+                for uniprot in unique_uniports
+            }
+        else:
+            # Accessions that resolved to a hyperlink in a previous run, within the
+            # cache time-to-live, are linked directly without hitting the network.
+            uniprot_cache = _read_timestamp_cache(
+                _uniprot_cache_file_path, _cache_ttl_sec
             )
-        )
-        uniprot_md_str = {}
-        for uniprot in unique_uniports:
-            uniprot_md_str[uniprot] = uniprot_to_md_str(uniprot)
-        df["UniProt Accession Number"] = df["UniProt Accession Number"].apply(
-            lambda x: uniprots_to_md(x, uniprot_md_str)
+            uncached_uniprots = [u for u in unique_uniports if u not in uniprot_cache]
+            with ThreadPoolExecutor(max_workers=_max_check_workers) as executor:
+                uncached_results = list(
+                    executor.map(uniprot_to_md_str, uncached_uniprots)
+                )
+            uniprot_md_str = {
+                uniprot: f"[{uniprot}](https://www.uniprot.org/uniprotkb/{uniprot})"
+                for uniprot in unique_uniports
+                if uniprot in uniprot_cache
+            }
+            uniprot_md_str.update(
+                (uniprot, md_str)
+                for uniprot, (md_str, confirmed) in zip(
+                    uncached_uniprots, uncached_results
+                )
+            )
+            # Only accessions confirmed with an HTTP 200 response are cached, a
+            # hyperlink emitted during a transient network failure is not a
+            # confirmation and is re-checked on the next run.
+            check_time = time.time()
+            uniprot_cache.update(
+                {
+                    uniprot: check_time
+                    for uniprot, (md_str, confirmed) in zip(
+                        uncached_uniprots, uncached_results
+                    )
+                    if confirmed
+                }
+            )
+            _write_timestamp_cache(_uniprot_cache_file_path, uniprot_cache)
+        # Substitute the hyperlinked markdown strings into the cells by mapping the
+        # exploded series and re-joining the multi-value cells, instead of a Python
+        # function call per row.
+        df["UniProt Accession Number"] = (
+            exploded_uniprots.map(uniprot_md_str).groupby(level=0).agg(", ".join)
         )
         print("Finished linking to UniProt...")
         print("Start linking to vendor websites...")
-        vendor_to_website = csv_to_md_str_dict(vendor_to_website_csv_file_path)
+        vendor_to_website = csv_to_md_str_dict(
+            vendor_to_website_csv_file_path, skip_url_validation
+        )
         try:
             df["Vendor"] = df["Vendor"].apply(lambda x: vendor_to_website[x])
         except KeyError as k:
@@ -258,12 +370,17 @@ def csv_to_md_with_url(
 
     with open(template_file_path, "r") as fp:
         input_md_str = fp.read()
-    with open(supporting_material_root_dir.parent / template_file_path.stem, "w") as fp:
-        fp.write(
-            input_md_str.replace(
-                "{reagent_resources_table}", df.to_markdown(index=False)
-            )
-        )
+    # Split the template around the placeholder and write the pieces separately,
+    # avoiding the full template+table copy a str.replace would materialize.
+    pre, post = input_md_str.split("{reagent_resources_table}", 1)
+    with open(
+        supporting_material_root_dir.parent / template_file_path.stem,
+        "w",
+        buffering=1 << 20,
+    ) as fp:
+        fp.write(pre)
+        fp.write(_table_2_md_str(df.values.tolist(), df.columns.tolist()))
+        fp.write(post)
     return 0
 
 
@@ -301,13 +418,12 @@ def main(argv=None):
     args = parser.parse_args(argv)
 
     try:
-        if args.skip_url_validation:
-            requests.get = short_circuit_requests_get
         return csv_to_md_with_url(
             template_file_path=args.md_template_file,
             csv_file_path=args.csv_file,
             supporting_material_root_dir=args.supporting_material_root_dir,
             vendor_to_website_csv_file_path=args.vendor_to_website,
+            skip_url_validation=args.skip_url_validation,
         )
     except Exception as e:
         print(
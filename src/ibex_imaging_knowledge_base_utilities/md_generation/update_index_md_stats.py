@@ -18,11 +18,13 @@
 
 import pandas as pd
 import argparse
+import re
 import sys
 from ibex_imaging_knowledge_base_utilities.argparse_types import (
     file_path_endswith,
     dir_path,
 )
+from .utilities import _read_csv_cached
 
 """
 This script computes statistics from the reagent_resources.csv file and injects them into the input markdown file.
@@ -45,15 +47,31 @@ by the string "NA").
 """
 
 
+# Conjugates that do not represent a fluorescent probe, excluded when counting
+# the number of fluorescent probes.
+_non_fluorescent_conjugates = frozenset(
+    ["NA", "Unconjugated", "Biotin", "HRP", "UT014", "UT015", "UT016", "UT019"]
+)
+
+
 def update_index_stats(md_template_file, input_csv, output_dir):
     with open(md_template_file, "r") as fp:
         input_md_str = fp.read()
     stats_dictionary = compute_stats_dictionary(input_csv)
-    output_str = input_md_str
-    for k, v in stats_dictionary.items():
-        output_str = output_str.replace("{" + k + "}", str(v))
-    with open(output_dir / md_template_file.stem, "w") as fp:
-        fp.write(output_str)
+    # Substitute all statistics in a single regex pass over the template.
+    # Unlike str.format, braces that don't correspond to a statistic (e.g.
+    # kramdown attribute markup) pass through untouched.
+    pattern = re.compile(r"\{(" + "|".join(map(re.escape, stats_dictionary)) + r")\}")
+    # Stream the template pieces and substituted values directly to the output
+    # file instead of materializing the substituted template in memory.
+    with open(output_dir / md_template_file.stem, "w", buffering=1 << 20) as fp:
+        pos = 0
+        for match in pattern.finditer(input_md_str):
+            start = match.start()
+            fp.write(input_md_str[pos:start])
+            fp.write(str(stats_dictionary[match.group(1)]))
+            pos = match.end()
+        fp.write(input_md_str[pos:])
 
 
 def entry2list(entry):
@@ -67,7 +85,9 @@ def entry2list(entry):
     if pd.isna(entry) or entry.strip() == "":
         return set()
     else:
-        res_list = [v.strip() for v in entry.split(";") if v.strip() != ""]
+        # Strip once per substring, duplicate detection is a single length
+        # comparison against the deduplicated set.
+        res_list = [stripped for v in entry.split(";") if (stripped := v.strip())]
         res = set(res_list)
         if len(res_list) != len(res):
             raise ValueError(f"entry with duplicate values - {entry}")
@@ -76,41 +96,35 @@ def entry2list(entry):
 
 def compute_stats_dictionary(input_csv):
     stats_dict = {}
-    df = pd.read_csv(input_csv, dtype=str, keep_default_na=False)
+    df = _read_csv_cached(input_csv)
     # Compute number of contributors, both original and folks that
     # replicated the validation and either agree or disagree with the
     # original contribution. The original contributor added the ORCID
     # to the "Agree" column and the "Contributor" column, so no need to
     # look at the "Contributor" column.
-    all_contributions = df["Agree"].tolist() + df["Disagree"].tolist()
-    all_unique_contributors = set(
-        [
-            v.strip()
-            for x in all_contributions
-            for v in x.split(";")
-            if v.strip() != "NA"
-        ]
+    # The split/strip/unique runs as vectorized string operations instead of a
+    # nested Python comprehension over the concatenated lists.
+    all_contributions = (
+        pd.concat([df["Agree"], df["Disagree"]], ignore_index=True)
+        .str.split(";")
+        .explode()
+        .str.strip()
     )
-    stats_dict["number_of_contributors"] = len(all_unique_contributors)
+    stats_dict["number_of_contributors"] = all_contributions[
+        all_contributions != "NA"
+    ].nunique()
     stats_dict["number_of_validated_reagents"] = len(df)
-    stats_dict["number_of_fluorescent_probes"] = len(
-        df["Conjugate"][
-            ~df["Conjugate"].isin(
-                [
-                    "NA",
-                    "Unconjugated",
-                    "Biotin",
-                    "HRP",
-                    "UT014",
-                    "UT015",
-                    "UT016",
-                    "UT019",
-                ]
-            )
-        ].unique()
+    stats_dict["number_of_fluorescent_probes"] = (
+        df["Conjugate"][~df["Conjugate"].isin(_non_fluorescent_conjugates)]
+        .unique()
+        .size
     )
-    stats_dict["number_of_tissues"] = len(
-        df[["Target Species", "Target Tissue", "Tissue State"]].drop_duplicates()
+    # Only the number of unique combinations is needed, count via the duplicated
+    # mask instead of materializing the deduplicated frame.
+    stats_dict["number_of_tissues"] = int(
+        (
+            ~df.duplicated(subset=["Target Species", "Target Tissue", "Tissue State"])
+        ).sum()
     )
     return stats_dict
 
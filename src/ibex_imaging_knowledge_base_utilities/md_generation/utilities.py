@@ -16,27 +16,165 @@
 #
 # =========================================================================
 
+import os
+import json
+import time
+import tempfile
+import hashlib
+import pathlib
+import pandas as pd
 
-def _description_2_md(description, num_words=3):
+# Parsed csv files are cached as parquet, keyed by the source path. A cache
+# entry is valid while it is newer than its source file. The md generation
+# scripts parse the same reagent_resources.csv several times per workflow run,
+# parquet loads the already-typed columns without re-parsing the csv.
+_parquet_cache_dir_path = pathlib.Path.home() / ".cache" / "ibex_kb" / "parquet"
+
+
+def _read_csv_cached(csv_file_path):
+    """
+    Read a knowledge-base csv file (dtype str, "NA" entries preserved) through an
+    on disk parquet cache. Falls back to a plain read when the cache cannot be
+    used, the cache is only a performance optimization.
+    """
+    csv_file_path = pathlib.Path(csv_file_path)
+    cache_file_path = None
+    try:
+        key = hashlib.md5(
+            str(csv_file_path.resolve()).encode(), usedforsecurity=False
+        ).hexdigest()
+        cache_file_path = _parquet_cache_dir_path / f"{key}.parquet"
+        if cache_file_path.stat().st_mtime > csv_file_path.stat().st_mtime:
+            return pd.read_parquet(cache_file_path, dtype_backend="pyarrow")
+    except (OSError, ValueError):
+        pass
+    df = pd.read_csv(
+        csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
+    if cache_file_path is not None:
+        # Write to a temporary file and atomically rename so that concurrent
+        # runs don't read a partially written file.
+        try:
+            cache_file_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_file_path = tempfile.mkstemp(dir=cache_file_path.parent)
+            os.close(fd)
+            df.to_parquet(tmp_file_path)
+            os.replace(tmp_file_path, cache_file_path)
+        except (OSError, ValueError):
+            pass
+    return df
+
+
+def _read_timestamp_cache(cache_file_path, ttl_sec):
+    """
+    Read an on disk cache, a json dictionary mapping a key (url, accession...) to
+    the time it was last successfully checked. Entries older than the time-to-live
+    are discarded. If there is no cache, or it is corrupt in any way (not valid
+    json, not a dictionary, non numeric timestamps), return an empty dictionary.
+    """
+    try:
+        with open(cache_file_path) as fp:
+            cache = json.load(fp)
+        expiry_time = time.time() - ttl_sec
+        return {key: t for key, t in cache.items() if t > expiry_time}
+    except (OSError, ValueError, AttributeError, TypeError):
+        return {}
+
+
+def _write_timestamp_cache(cache_file_path, cache):
+    """
+    Persist a timestamp cache, write to a temporary file and atomically rename so
+    that concurrent runs don't read a partially written file. Failure to persist
+    is not an error, the cache is only a performance optimization.
     """
-    Convert the description markdown formatted string to html using the "details"
-    tag which results in a dropdown/accordion display of the information.
+    try:
+        cache_file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_file_path = tempfile.mkstemp(dir=cache_file_path.parent)
+        with os.fdopen(fd, "w") as fp:
+            json.dump(cache, fp)
+        os.replace(tmp_file_path, cache_file_path)
+    except OSError:
+        pass
+
+
+def _description_2_md(descriptions, num_words=3):
+    """
+    Convert a series of description markdown formatted strings to html using the
+    "details" tag which results in a dropdown/accordion display of the information.
     The num_words parameter indicates how many words to display in the accordion
-    summary.
+    summary. Blank descriptions become empty strings. The summary extraction and
+    markup concatenation run as vectorized string operations.
     """
-    if not description.strip():
-        return ""
+    first_words = descriptions.str.split(n=num_words).str[:num_words].str.join(" ")
     # Because the html code will go inside a markdown table and we are using kramdown,
     # default markdown renderer for jekyll, we need to wrap it with nomarkdown to tell kramdown to leave it
     # as is.
-    return (
-        "{::nomarkdown}"
-        + f"<details ><summary>{' '.join(description.split()[0:num_words])}...</summary><p>{description}</p></details>"
-        + "{:/}"
+    md_strs = (
+        "{::nomarkdown}<details ><summary>"
+        + first_words
+        + "...</summary><p>"
+        + descriptions
+        + "</p></details>{:/}"
+    )
+    return md_strs.where(descriptions.str.strip() != "", "")
+
+
+def _table_2_md_str(cells, headers, colalign=None):
+    """
+    Render a table of string cells as a pipe (kramdown/GitHub) markdown table.
+    This is a minimal replacement for tabulate's "pipe" format which spends most
+    of its time on per-cell type dispatch and number parsing that our
+    already-stringified tables don't need. Columns are padded to the widest cell
+    (headers get two extra padding characters, matching tabulate's MIN_PADDING)
+    and alignment is expressed in the separator row. The output is byte
+    identical to tabulate for non-empty string tables with the given (or default
+    left) alignment. Two intentional divergences: tabulate's number parsing is
+    dropped, a column whose entries all look numeric is no longer reformatted
+    and right-aligned, it renders as the left-aligned strings found in the csv
+    file; and for a table with no data rows tabulate omits the alignment colons
+    from the separator row while this builder always emits them (equivalent
+    rendering, different bytes).
+    """
+    if colalign is None:
+        colalign = ["left"] * len(headers)
+    widths = [max(len(h) + 2, 3) for h in headers]
+    for row in cells:
+        for i, c in enumerate(row):
+            if len(c) > widths[i]:
+                widths[i] = len(c)
+
+    def fmt(value, width, align):
+        if align == "right":
+            return value.rjust(width)
+        if align == "center":
+            return value.center(width)
+        return value.ljust(width)
+
+    def separator(width, align):
+        if align == "right":
+            return "-" * (width + 1) + ":"
+        if align == "center":
+            return ":" + "-" * width + ":"
+        return ":" + "-" * (width + 1)
+
+    lines = [
+        "| "
+        + " | ".join(fmt(h, w, a) for h, w, a in zip(headers, widths, colalign))
+        + " |",
+        "|" + "|".join(separator(w, a) for w, a in zip(widths, colalign)) + "|",
+    ]
+    lines.extend(
+        "| " + " | ".join(fmt(c, w, a) for c, w, a in zip(row, widths, colalign)) + " |"
+        for row in cells
     )
+    return "\n".join(lines)
 
 
-def _dataframe_2_md(df, *args, **kwargs):
+def _dataframe_2_md(df, colalign=None):
     """
     Convert a dataframe to markdown. This function addresses an issue with
     the input which will be displayed in a markdown table containing newlines.
@@ -44,4 +182,9 @@ def _dataframe_2_md(df, *args, **kwargs):
     replace all '\n' characters with the html tag <br> which works with the
     markdown table.
     """
-    return df.replace("\n", "<br>", regex=True).to_markdown(*args, **kwargs)
+    df = df.replace("\n", "<br>", regex=True)
+    return _table_2_md_str(
+        [[str(c) for c in row] for row in df.values.tolist()],
+        [str(c) for c in df.columns],
+        colalign,
+    )
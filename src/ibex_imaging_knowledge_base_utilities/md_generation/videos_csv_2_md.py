@@ -23,7 +23,6 @@ from ibex_imaging_knowledge_base_utilities.argparse_types import (
     file_path_endswith,
     dir_path,
 )
-from datetime import date
 from .utilities import _description_2_md, _dataframe_2_md
 
 """
@@ -38,6 +37,28 @@ Assumption: The videos.csv file is valid. It conforms to the expected format
 """
 
 
+class _LazyCategoryTables(dict):
+    """
+    Mapping from template placeholder ({general_table}, {tutorial_table}) to the
+    rendered markdown table. Tables are rendered on first lookup, a template that
+    references only one of the placeholders doesn't pay for rendering the other.
+    """
+
+    def __init__(self, category_groups, empty_df):
+        super().__init__()
+        self._category_groups = category_groups
+        self._empty_df = empty_df
+
+    def __missing__(self, key):
+        category = {"general_table": "general", "tutorial_table": "tutorial"}[key]
+        table_md_str = _dataframe_2_md(
+            self._category_groups.get(category, self._empty_df)[["Title", "Details"]],
+            colalign=["left", "left"],
+        )
+        self[key] = table_md_str
+        return table_md_str
+
+
 def videos_csv_to_md(template_file_path, csv_file_path, output_dir):
     """
     Convert the IBEX knowledge-base videos csv file to markdown. Output is written to the given output
@@ -46,38 +67,39 @@ def videos_csv_to_md(template_file_path, csv_file_path, output_dir):
     of the actual tables.
     """
     # Read the dataframe and keep entries that are "NA", don't convert to nan
-    df = pd.read_csv(csv_file_path, dtype=str, keep_default_na=False)
-    # Add the hyperlink to the title column, using the string "detailed protocol"
-    df["Title"] = df[["Title", "URL"]].apply(
-        lambda x: f"{x.iloc[0]} [[video]({x.iloc[1]})].", axis=1
+    df = pd.read_csv(
+        csv_file_path,
+        dtype=str,
+        keep_default_na=False,
+        engine="pyarrow",
+        dtype_backend="pyarrow",
     )
+    # Add the hyperlink to the title column, vectorized string concatenation.
+    df["Title"] = df["Title"] + " [[video](" + df["URL"] + ")]."
     # Convert the detailed description to markdown, with the details html markup (accordion view).
-    df["Details"] = df["Details"].apply(_description_2_md)
+    df["Details"] = _description_2_md(df["Details"])
 
     # Combine the separate Year, Month, Day columns into a date column. Conversion to int
     # gets rid of any leading zeros (if someone used 04 and not 4 to denote april).
     # Sort in reverse chronological order.
-    df["Date"] = df[["Year", "Month", "Day"]].apply(
-        lambda x: date(int(x.iloc[0]), int(x.iloc[1]), int(x.iloc[2])), axis=1
+    df["Date"] = pd.to_datetime(
+        df[["Year", "Month", "Day"]]
+        .rename(columns={"Year": "year", "Month": "month", "Day": "day"})
+        .astype(int)
+    )
+    # Stable sort on the single datetime64 key, ties keep their csv file order.
+    df.sort_values(by="Date", ascending=False, inplace=True, kind="stable")
+    # Split by category in a single pass over the column instead of two
+    # separate element-wise comparisons.
+    category_groups = dict(tuple(df.groupby("Category", sort=False)))
+    empty_df = df.iloc[0:0]
+    input_md_str = template_file_path.read_text()
+    # format_map with the lazy mapping only renders the tables whose
+    # placeholders actually appear in the template. The formatted string is
+    # written with a single write_text call.
+    (output_dir / template_file_path.stem).write_text(
+        input_md_str.format_map(_LazyCategoryTables(category_groups, empty_df))
     )
-    df.sort_values(by=["Date"], ascending=False, inplace=True)
-    with open(template_file_path, "r") as fp:
-        input_md_str = fp.read()
-    with open(output_dir / template_file_path.stem, "w") as fp:
-        fp.write(
-            input_md_str.format(
-                general_table=_dataframe_2_md(
-                    df[df["Category"] == "general"][["Title", "Details"]],
-                    index=False,
-                    colalign=["left", "left"],
-                ),
-                tutorial_table=_dataframe_2_md(
-                    df[df["Category"] == "tutorial"][["Title", "Details"]],
-                    index=False,
-                    colalign=["left", "left"],
-                ),
-            )
-        )
 
 
 def main(argv=None):
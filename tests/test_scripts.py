@@ -1,6 +1,9 @@
 import pytest
 import pathlib
+import functools
 import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from ibex_imaging_knowledge_base_utilities.md_generation.bib2md import bibfile2md
 from ibex_imaging_knowledge_base_utilities.md_generation.zenodo_json_2_thewho_md import (
@@ -51,26 +54,49 @@ from ibex_imaging_knowledge_base_utilities.md_generation.data_software_csv_2_md
 )
 
 
+@functools.lru_cache(maxsize=None)
+def _normalized_file_contents(file_name, mtime_ns, size):
+    """
+    Read a file as bytes with platform-specific line endings normalized to \n.
+    Cached on (path, mtime_ns, size) so hashing the same unchanged file again
+    within a pytest run does not re-read it, the key invalidates when a test
+    overwrites the file.
+    """
+    with open(file_name, "rb") as fp:
+        return fp.read().replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+
 class BaseTest:
-    def setup_method(self):
-        # Path to testing data is expected in the following location:
-        self.data_path = pathlib.Path(__file__).parent.absolute() / "data"
+    # Path to testing data is expected in the following location. Resolved once
+    # at import instead of per-test in setup_method.
+    data_path = (pathlib.Path(__file__).parent / "data").resolve()
 
     def files_md5(self, file_path_list):
         """
-        Compute a single/combined md5 hash for a list of files. Open each file as text and use the read() method which
-        to quote the documentation:
-        In text mode, the default when reading is to convert platform-specific line endings (\n on Unix, \r\n on
-        Windows) to just \n.
+        Compute a single/combined md5 hash for a list of files. Read each file as bytes and normalize
+        platform-specific line endings (\r\n on Windows, \r on old MacOS) to just \n, mirroring what
+        text mode reading does.
 
-        This ensures that we get the same md5 hash on all platforms. If we opened the text files as binary the hashes
-        become platform dependent (\r\n vs. \n).
+        This ensures that we get the same md5 hash on all platforms without the decode/encode round
+        trip that reading in text mode incurs. The hash values are identical to those previously
+        computed by reading in text mode and encoding to utf-8.
         """
-        md5 = hashlib.md5()
-        for file_name in file_path_list:
-            with open(file_name, "r") as fp:
-                file_contents = fp.read()
-                md5.update(file_contents.encode("utf-8"))
+
+        def read_one(file_name):
+            file_stat = os.stat(file_name)
+            return _normalized_file_contents(
+                str(file_name), file_stat.st_mtime_ns, file_stat.st_size
+            )
+
+        # Read the files concurrently, the combined hash is updated serially in
+        # the given file order so its value is unchanged.
+        with ThreadPoolExecutor(
+            max_workers=min(8, max(len(file_path_list), 1))
+        ) as executor:
+            contents = executor.map(read_one, file_path_list)
+            md5 = hashlib.md5()
+            for file_contents in contents:
+                md5.update(file_contents)
         return md5.hexdigest()
 
 
@@ -94,16 +120,22 @@ class TestCSV2MD(BaseTest):
         supporting_material_root_dir,
         vendor_to_website_csv_file_path,
         result_md5hash,
+        tmp_path,
     ):
-
+        # Write the output using the tmp_path fixture. The output is written to the
+        # parent directory of the supporting material directory and the links only
+        # use the directory name, so an empty directory under tmp_path works and
+        # keeps concurrent test runs (pytest-xdist) from racing on a shared file.
+        supporting_material_dir = tmp_path / supporting_material_root_dir
+        supporting_material_dir.mkdir()
         csv_to_md_with_url(
             self.data_path / md_template_file_name,
             self.data_path / csv_file_name,
-            self.data_path / supporting_material_root_dir,
+            supporting_material_dir,
             self.data_path / vendor_to_website_csv_file_path,
         )
         assert (
-            self.files_md5([(self.data_path / csv_file_name).with_suffix(".md")])
+            self.files_md5([tmp_path / pathlib.Path(md_template_file_name).stem])
             == result_md5hash
         )
 